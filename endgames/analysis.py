@@ -3,28 +3,53 @@
 # pylint: disable=C0301
 
 import time
+from multiprocessing import Pool
 import pandas as pd
 from tqdm import tqdm
 from endgames.game.study import *  # pylint: disable=W0401,W0614
 from endgames.game.util import create_hypo_url
 
-def iterate_over_decks(num: int, variant_name: str="No Variant"):
+_WORKER_SI = None
+_WORKER_DECKS = {}  # variant name to a Deck recycled via Deck.reset()
+
+def _init_worker():
+    """Gives each worker process its own ShapeIdentifier."""
+    global _WORKER_SI  # pylint: disable=W0603
+    _WORKER_SI = ShapeIdentifier()
+    _WORKER_DECKS.clear()
+
+def _study_seed(task):
+    """Studies the deck with the given seed. Runs in a worker process."""
+    seed, variant_name = task
+    start = time.time()
+    if variant_name not in _WORKER_DECKS:
+        _WORKER_DECKS[variant_name] = Deck(variant_name)
+    deck = _WORKER_DECKS[variant_name]
+    deck.reset(seed)
+    inf, forced_pace_zero = deck.check_for_infeasibility(_WORKER_SI)
+    end = time.time()
+    return [seed, repr(deck), inf, forced_pace_zero, end - start]
+
+def iterate_over_decks(num: int, variant_name: str="No Variant",
+                       processes: int=1):
     """Performs some execution on num decks.
 
     Args:
         num (int): number of decks to be generated
+        variant_name (str): name of a Hanab Live variant
+        processes (int, optional): number of worker processes. Decks
+            are independent, so they are split across processes; the
+            output order matches the serial run. Defaults to 1.
     """
-    data, column_names = [], ["Seed", "Deck", "Infeasible", "Forced to Pace Zero", "Duration"]
-    si = ShapeIdentifier()
-    for seed in tqdm(range(1, num + 1)):
-        seed = "egocentric" + str(seed)
-        start = time.time()
-        deck = Deck(variant_name)
-        deck.shuffle(seed)
-        inf, forced_pace_zero = deck.check_for_infeasibility(si)
-        end = time.time()
-        line = [seed, repr(deck), inf, forced_pace_zero, end - start]
-        data.append(line)
+    column_names = ["Seed", "Deck", "Infeasible", "Forced to Pace Zero", "Duration"]
+    tasks = [("egocentric" + str(seed), variant_name) for seed in range(1, num + 1)]
+    if processes > 1:
+        with Pool(processes, initializer=_init_worker) as pool:
+            results = pool.imap(_study_seed, tasks, chunksize=256)
+            data = list(tqdm(results, total=num))
+    else:
+        _init_worker()
+        data = [_study_seed(task) for task in tqdm(tasks)]
     df = pd.DataFrame(data, columns=column_names)
     print((df["Infeasible"]).sum() / len(df["Infeasible"]))
     print(max(df["Duration"]), min(df["Duration"]))
@@ -1,10 +1,21 @@
 """Tools to anaylze Hanabi Games"""
+import copy
+
 class GameState:
     """
     Gamestate is a class to handle what an ongoing game of hanabi looks like on a specific turn.
     It is initialized with JSON data and the turn number, then
     contains methods to provide information about the game on that turn.
     """
+    __slots__ = (
+        # game-invariant info
+        "data", "deck", "players", "actions", "suits", "ranks",
+        "suit_count", "variant", "_clue_inc", "player_count", "hand_size",
+        # turn-dependent info
+        "clue_token_count", "turn", "discard_pile", "play_stack_tops",
+        "score", "hands", "current_player_index", "action_count",
+        "strike_count", "draw_pile_size", "_diverged",
+    )
 
     def __init__(self, data, turn):
 
@@ -13,146 +24,193 @@ class GameState:
         self.data = data
         self.deck = data["deck"]
 
-        for i, card in enumerate(self.deck):
-            card["order"] = i
+        # orders are assigned all at once, so a deck whose last card
+        # has its order was already seen by an earlier GameState
+        if self.deck and self.deck[-1].get("order") != len(self.deck) - 1:
+            for i, card in enumerate(self.deck):
+                card["order"] = i
 
         self.players = data["players"]
         self.actions = data["actions"]
-        self.suit_count = 1 + max([card["suitIndex"] for card in self.deck])
+        # suit and rank of each card, indexed by order
+        self.suits = [card["suitIndex"] for card in self.deck]
+        self.ranks = [card["rank"] for card in self.deck]
+        self.suit_count = 1 + max(self.suits)
         try:
             self.variant = data["options"]["variant"]
         except KeyError:
             self.variant = "No Variant"
+        # clues gained per discard or played 5
+        clue_starved = self.variant.lower().startswith("clue starved")
+        self._clue_inc = 0.5 if clue_starved else 1
         self.player_count = len(self.players)
         self.hand_size = _get_hand_size(self.data)
 
-        # Turn-dependent game info
+        # progress to current turn
+        self._start()
+        self.advance_to(turn)
 
+    def _start(self):
+        """Sets the turn-dependent game info to the start of the game"""
         self.clue_token_count = 8
         self.turn = 0
         self.discard_pile = []
-        self.play_stacks = [[] for _ in range(self.suit_count)]
+        self.play_stack_tops = [0] * self.suit_count  # top rank per suit
         self.score = 0
+        # each hand maps card order to card, oldest card first
         self.hands = _get_starting_hands(
             self.deck, self.player_count, self.hand_size)
         self.current_player_index = 0
+        self.action_count = 0  # actions implemented, including vtk
         self.strike_count = 0
         self.draw_pile_size = len(self.deck) - \
             self.player_count * self.hand_size
-
-        # progress to current turn
-        for i in range(turn):
-            self.implement_action(self.actions[i])
+        # set once an action not in the game's record is implemented
+        self._diverged = False
 
     # Helper for plays, bombs, and discards
 
     def _remove_from_hand(self, player_index, order):
 
-        found = False
-        for i, card in enumerate(self.hands[player_index]):
-            if card["order"] == order:
-                found = True
-                found_slot = i
-                real_card = card
-                break
-
-        if not found:
+        hand = self.hands[player_index]
+        if order not in hand:
             print(f'could not find card {order}!')
             return self.deck[order]
 
-        remains = self.hands[player_index][:found_slot] + \
-            self.hands[player_index][found_slot + 1:]
-        self.hands[player_index] = remains
-        return real_card
+        return hand.pop(order)
 
     def _draw_card(self):
         if self.draw_pile_size == 0:
             return
-        card = self.deck[- self.draw_pile_size]
-        self.hands[self.current_player_index] = [
-            card] + self.hands[self.current_player_index]
+        order = len(self.deck) - self.draw_pile_size
+        self.hands[self.current_player_index][order] = self.deck[order]
         self.draw_pile_size -= 1
 
     def _get_type(self, action):
-        i = action["type"]
-        if i == 3:
-            return "rank"
-        if i == 2:
-            return "color"
-        if i == 1:
-            return "discard"
-        if i == 4 or i == 5:
-            return "vtk"
-        card = self.deck[action["target"]]
-        if len(self.play_stacks[card["suitIndex"]]) == card["rank"] - 1:
+        action_type = _ACTION_TYPES.get(action["type"])
+        if action_type is not None:
+            return action_type
+        target = action["target"]
+        if self.play_stack_tops[self.suits[target]] == self.ranks[target] - 1:
             return "play"
         return "bomb"
 
     def _increment_clue_count(self):
-        if self.variant[0:12] == "Clue starved":
-            inc = 0.5
-        else:
-            inc = 1
-        self.clue_token_count = min(8, self.clue_token_count + inc)
+        self.clue_token_count = min(8, self.clue_token_count + self._clue_inc)
 
 
     def implement_action(self, action):
         """Increments the gamestate for when an action plays"""
-        action_type = self._get_type(action)
-
-        if action_type == "rank":
-            self.clue_token_count -= 1
-
-        elif action_type == "color":
-            self.clue_token_count -= 1
-
-        elif action_type == "discard":
-            card = self._remove_from_hand(
-                self.current_player_index, action["target"])
-            self._increment_clue_count()
-            self.discard_pile.append(card)
-            self._draw_card()
-
-        elif action_type == "play":
-            card = self._remove_from_hand(
-                self.current_player_index, action["target"])
-            self.play_stacks[card["suitIndex"]].append(card)
-            self._draw_card()
+        if self.action_count >= len(self.actions) or \
+                action != self.actions[self.action_count]:
+            self._diverged = True
+        handler = _ACTION_HANDLERS.get(action["type"], GameState._play_or_bomb)
+        handler(self, action.get("target"))
+        self.action_count += 1
+
+    # Handlers for each action type, dispatched via _ACTION_HANDLERS.
+    # Each takes the action's target: a card order or a player index
+
+    def _clue(self, target):  # pylint: disable=unused-argument
+        self.clue_token_count -= 1
+        self._end_turn()
+
+    def _discard(self, target):
+        card = self._remove_from_hand(self.current_player_index, target)
+        self._increment_clue_count()
+        self.discard_pile.append(card)
+        self._draw_card()
+        self._end_turn()
+
+    def _play_or_bomb(self, target):
+        card = self._remove_from_hand(self.current_player_index, target)
+        suit, rank = self.suits[target], self.ranks[target]
+        if self.play_stack_tops[suit] == rank - 1:
+            self.play_stack_tops[suit] = rank
             self.score += 1
-
-            if self.deck[action["target"]]["rank"] == 5:
+            if rank == 5:
                 self._increment_clue_count()
-
-        elif action_type == "bomb":
-            card = self._remove_from_hand(
-                self.current_player_index, action["target"])
+        else:
             self.discard_pile.append(card)
             self.strike_count += 1
-            self._draw_card()
-        if action_type != "vtk":
-            self.current_player_index = (
-                self.current_player_index + 1) % self.player_count
-            self.turn += 1
+        self._draw_card()
+        self._end_turn()
+
+    def _vtk(self, target):  # pylint: disable=unused-argument
+        pass
+
+    def _end_turn(self):
+        self.current_player_index = (
+            self.current_player_index + 1) % self.player_count
+        self.turn += 1
+
+    def advance_to(self, action_count):
+        """Implements the game's actions until action_count are done"""
+        # implement_action inlined, with lookups hoisted out of the loop
+        pending = self.actions[self.action_count:action_count]
+        get_handler = _ACTION_HANDLERS.get
+        play_or_bomb = GameState._play_or_bomb
+        for action in pending:
+            get_handler(action["type"], play_or_bomb)(self, action.get("target"))
+        self.action_count += len(pending)
 
 
     def review_turn(self, turn_count):
-        """Replays a state at a prior turn"""
+        """Replays a state at a prior turn
+
+        Builds on a copy of this state when turn_count is not behind it,
+        else replays from the start of the game. This state is left
+        unchanged. If implement_action was given an action that is not
+        in the game's record, the replay always starts from the start of
+        the game, so the result follows the record.
+        """
         if turn_count >= len(self.actions) or turn_count < 0:
             return False
 
-        return GameState(self.data, turn_count)
+        # only a rewind or a diverged state needs a full replay from the
+        # start, and even then the game-invariant info is kept
+        if turn_count < self.action_count or self._diverged:
+            state = copy.copy(self)
+            state._start()  # pylint: disable=protected-access
+        else:
+            state = self._copy()
+        state.advance_to(turn_count)
+        return state
+
+    def snapshots(self):
+        """Returns the state at every turn review_turn accepts, in order
+
+        Replays the game once, so the i-th state equals review_turn(i)
+        without replaying the first i actions for each turn.
+        """
+        state = copy.copy(self)
+        state._start()  # pylint: disable=protected-access
+        states = []
+        for action in self.actions:
+            states.append(state._copy())  # pylint: disable=protected-access
+            state.implement_action(action)
+        return states
+
+    def __copy__(self):
+        state = GameState.__new__(GameState)
+        for name in GameState.__slots__:
+            setattr(state, name, getattr(self, name))
+        return state
+
+    def _copy(self):
+        """Copies the turn-dependent state; cards are shared"""
+        state = copy.copy(self)
+        state.discard_pile = list(self.discard_pile)
+        state.play_stack_tops = list(self.play_stack_tops)
+        state.hands = [dict(hand) for hand in self.hands]
+        return state
 
     # print
 
     def __repr__(self):
-        hands_repr = []
-        for hand in self.hands:
-            hand_repr = []
-            for card in hand:
-                rank = card["rank"]
-                suit = "RYGBKM"[card["suitIndex"]]
-                hand_repr.append(suit + str(rank))
-            hands_repr.append(hand_repr)
+        hands_repr = [[_SUITS[card["suitIndex"]] + str(card["rank"])
+                       for card in reversed(hand.values())]
+                      for hand in self.hands]
 
         return (
             f"turn: {self.turn}\n" +
@@ -160,6 +218,18 @@ class GameState:
         )
 
 
+_SUITS = "RYGBKM"
+_ACTION_TYPES = {1: "discard", 2: "color", 3: "rank", 4: "vtk", 5: "vtk"}
+# any other type is a play or a bomb
+_ACTION_HANDLERS = {
+    1: GameState._discard,
+    2: GameState._clue,
+    3: GameState._clue,
+    4: GameState._vtk,
+    5: GameState._vtk,
+}
+
+
 def _get_hand_size(data):
     player_count = len(data["players"])
     if player_count < 4:
@@ -178,11 +248,5 @@ def _get_hand_size(data):
 
 
 def _get_starting_hands(deck, player_count, hand_size):
-    hands = []
-    pile = iter(deck)
-    for _ in range(player_count):
-        hand = []
-        for __ in range(hand_size):
-            hand.append(next(pile))
-        hands.append([card for card in reversed(hand)])
-    return hands
+    return [{order: deck[order] for order in range(start, start + hand_size)}
+            for start in range(0, player_count * hand_size, hand_size)]
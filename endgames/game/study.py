@@ -2,6 +2,7 @@
 
 from bisect import bisect
 import itertools
+import math
 from endgames.game.util import Deck, create_bespoke_deck, lookup_hand_size
 from endgames.game.io import read_printout
 
@@ -31,6 +32,12 @@ class PathFinder:
         self.hand_size = hand_size
         self.capacity = hand_size * num_players
 
+        # decoded once so that per-path checks never touch Card objects
+        self._cards = [(card.suit, card.rank) for card in deck.deck]
+        # one bit per card type, with the next rank of a suit in the
+        # next bit up (8 bits per suit, so rank 6 is never set)
+        self._bits = [1 << (card.suit << 3 | card.rank) for card in deck.deck]
+
     def check_for_infeasibility(self):
         """Checks if the deck is impossible to win.
 
@@ -58,6 +65,13 @@ class PathFinder:
         Returns:
             bool: able to prove the deck is infeasible?
         """
+        # cheap pre-filter: if playing the earliest copy of every card
+        # already reaches pace one, no path enumeration is needed
+        path = self._pathify(self._get_greedy_locations())
+        if not self._check_for_capacity_loss(path, self.capacity) and \
+            not self._check_for_pace_loss(path, 1):
+            return False, False
+
         _, suit_to_ordering = self._split_into_suits()
         paths_through_deck = self._suitify2(suit_to_ordering)
         inf, paths = self.check_for_1p_inf(paths_through_deck)
@@ -82,9 +96,11 @@ class PathFinder:
             path = self._pathify(path)
             if self._check_for_capacity_loss(path, self.capacity):
                 continue
-            if self._check_for_pace_loss(path, self.num_players):
+            # one backward scan settles both num_players and pace one
+            deficit = self._get_pace_deficit(path, self.num_players)
+            if deficit > self.num_players:
                 continue
-            if not self._check_for_pace_loss(path, 1):
+            if deficit <= 1:
                 found_pace_one = True
                 proved_infeasible = False
                 break
@@ -95,33 +111,37 @@ class PathFinder:
 
     def check_for_pace_loss(self):
         """Checks for pace loss with infinite hand size."""
-        cards = set()
-        locations = []
-        for card in self.deck.deck:
-            if card.value not in cards:
-                cards.add(card.value)
-                locations.append(card.value)
-        path = self._pathify(locations)
+        path = self._pathify(self._get_greedy_locations())
         return self._check_for_pace_loss(path, self.num_players)
 
+    def _get_greedy_locations(self):
+        """Returns the location of the earliest copy of each card."""
+        seen = set()
+        locations = []
+        for loc, card in enumerate(self._cards):
+            if card not in seen:
+                seen.add(card)
+                locations.append(loc)
+        return locations
+
     def _split_into_suits(self):
         """Splits the deck by suit into useful dictionaries.
 
         Returns:
         - locations (dict): Mapping of suit to rank to deck indices
-        - suits (dict): Mapping of suit to list of Card instances
+        - suits (dict): Mapping of suit to list of (location, Card)
         """
         locations = {}  # suit to rank to deck indices
         suits = {}
         for loc, card in enumerate(self.deck.deck):
-            suit, rank = card.interpret()
+            suit, rank = card.suit, card.rank
             if suit not in locations:
                 locations[suit] = {}
                 suits[suit] = []
             if rank not in locations[suit]:
                 locations[suit][rank] = []
             locations[suit][rank].append(loc)
-            suits[suit].append(card)
+            suits[suit].append((loc, card))
 
         for suit, ranks_to_locs in locations.items():
             for rank, locs in ranks_to_locs.items():
@@ -130,39 +150,40 @@ class PathFinder:
 
         return locations, suits
 
-    # currently being phased out
-    def _suitify(self, locations):
-        # minimal score of an All or Nothing agent that must eventually
-        # play all cards and plays cards as the last copy of a playable
-        # card is drawn
-        score_lb = [[0] * 50 for _ in range(5)]
-
-        # used to implement pace checks (...b...a...b...c...)
-        # pace calculation for each suit
-        for suit, ranks_to_locs in locations.items():
-            index = suit - 1
-            locs = []
-            for rank in range(1, 6):
-                locs.append(max(ranks_to_locs[rank]))
-                loc = max(locs)
-                score_lb[index][loc] = rank
-
-        paths = []
-        for ranks_to_locs in locations.values():
-            paths += ranks_to_locs.values()
-        return itertools.product(*paths)
-
     def _suitify2(self, orderings):
         """Generates possible paths through the deck.
 
         Utilizes precomputation on suit shape. Finds path for each
         suit then combines each suit path to get a full deck path.
+
+        Suit paths that yield a pace loss on their own are dropped
+        first, since a full path needs at least as many final plays as
+        any one of its suit paths (see _check_for_suit_loss()).
         """
         paths = []
         for suit in orderings:
-            paths.append(self.si.identify(orderings[suit]))
+            paths.append(tuple(
+                suit_path for suit_path in self.si.identify(orderings[suit])
+                if not self._check_for_suit_loss(suit_path)))
         return itertools.product(*paths)
 
+    def _check_for_suit_loss(self, suit_path):
+        """Checks if the path of a single suit already yields a loss.
+
+        Only pace is checked, as one suit never holds more than 4 cards.
+        Walking back from the end of the deck, the stack of this suit
+        is 6 - rank once a card is reached, so _check_for_pace_loss()
+        reduces to comparing each card against the pace at its location.
+        """
+        cards = self._cards
+        last = len(cards) - 1
+        pace = self.num_players + last
+        for loc in suit_path:
+            rank = cards[loc][1]
+            if 6 - rank > pace - loc or (loc == last and rank != 5):
+                return True
+        return False
+
     def _pathify(self, locs):
         """Converts a list of locations into a boolean path."""
         path = [False] * len(self.deck.deck)
@@ -172,48 +193,66 @@ class PathFinder:
 
     def _check_for_pace_loss(self, path, num_final_plays):
         """Checks if the path yields a pace loss."""
-        index = len(self.deck.deck) - 1
-        curr = path[index]
-        pace = num_final_plays
+        return self._get_pace_deficit(path, num_final_plays) > num_final_plays
+
+    def _get_pace_deficit(self, path, limit):
+        """Returns the fewest final plays that avoid a pace loss.
+
+        That is, the path yields a pace loss with n final plays exactly
+        when n is less than the returned value. Stops early once the
+        value exceeds limit, and returns math.inf for a BDR loss.
+        """
+        cards = self._cards
+        last = len(cards) - 1
         stacks = [0] * len(self.deck.variant.suits)
+        max_score = 5 * len(stacks)
+        total = 0  # running sum(stacks)
+        deficit = 0
         # checks for BDR loss
-        if curr:
-            card = self.deck.deck[index]
-            if card.interpret()[1] != 5:
-                return True
-            suit, rank = card.interpret()
+        if path[last]:
+            suit, rank = cards[last]
+            if rank != 5:
+                return math.inf
             stacks[suit] = max(stacks[suit], 6 - rank)  # should be 1
-        while pace < 5 * len(self.deck.variant.suits):  # max score
-            pace += 1
-            index -= 1
-            curr = path[index]
-            if curr:
-                card = self.deck.deck[index]
-                suit, rank = card.interpret()
-                stacks[suit] = max(stacks[suit], 6 - rank)
-            if sum(stacks) > pace:
-                return True
-        return False
+            total = stacks[suit]
+        # pace grows by one per card walking back from the end of the
+        # deck, but the stacks only grow at locations on the path, so
+        # only those locations can yield a pace loss
+        steps = range(last - 1, last - max_score, -1)
+        on_path = itertools.islice(reversed(path), 1, None)
+        for index in itertools.compress(steps, on_path):
+            suit, rank = cards[index]
+            new, old = 6 - rank, stacks[suit]
+            if new > old:
+                total += new - old
+                stacks[suit] = new
+                if total - (last - index) > deficit:
+                    deficit = total - (last - index)
+                    if deficit > limit:
+                        break
+        return deficit
 
     def _check_for_capacity_loss(self, path, capacity):
         """Checks if the path yields a hand capacity loss."""
-        hand = set()
+        cards, bits = self._cards, self._bits
+        hand = 0  # bitmask of held cards
+        held = 0
         stacks = [0] * len(self.deck.variant.suits)
-        for index, curr in enumerate(path):
-            if not curr:
-                continue
-            card = self.deck.deck[index]
-            suit, rank = card.interpret()
+        # only visits locations on the path
+        for index in itertools.compress(range(len(path)), path):
+            suit, rank = cards[index]
             if stacks[suit] == rank - 1:  # i.e., playable
-                newly_playable = card.value + 1
+                newly_playable = bits[index] << 1
                 stacks[suit] += 1
-                while newly_playable in hand:
-                    hand.remove(newly_playable)
-                    newly_playable += 1
+                while hand & newly_playable:
+                    hand ^= newly_playable
+                    held -= 1
+                    newly_playable <<= 1
                     stacks[suit] += 1
-            else:
-                hand.add(card.value)
-                if len(hand) == capacity:
+            elif not hand & bits[index]:
+                hand |= bits[index]
+                held += 1
+                if held == capacity:
                     return True
         return False
 
@@ -226,39 +265,42 @@ class PathFinder:
 
     def _get_pace_breakpoints(self, path, value=0):
         """Returns locations at which pace must reach value."""
-        index = len(self.deck.deck) - 1
+        cards = self._cards
+        index = len(cards) - 1
         curr = path[index]
         pace = self.num_players
         stacks = [0] * len(self.deck.variant.suits)
+        total = 0  # running sum(stacks)
         locations = []
         # checks for BDR loss
         if curr:
-            card = self.deck.deck[index]
-            suit, rank = card.interpret()
+            suit, rank = cards[index]
             stacks[suit] = max(stacks[suit], 6 - rank)  # should be 1
+            total = stacks[suit]
         while pace < 5 * len(self.deck.variant.suits):  # max score
             pace += 1
             index -= 1
             curr = path[index]
             if curr:
-                card = self.deck.deck[index]
-                suit, rank = card.interpret()
-                stacks[suit] = max(stacks[suit], 6 - rank)
-            if sum(stacks) == pace + value:
+                suit, rank = cards[index]
+                if 6 - rank > stacks[suit]:
+                    total += 6 - rank - stacks[suit]
+                    stacks[suit] = 6 - rank
+            if total == pace + value:
                 locations.append(index)
         return locations
 
     def _get_breakpoint_connectors(self, path, locations):
         locs_to_entries = {loc: [] for loc in locations}
         locs_to_stacks = {loc: [] for loc in locations}
+        cards = self._cards
         hand = set()
         stacks = [0] * len(self.deck.variant.suits)
         prev, reached_pace_zero = tuple(stacks), False
         for index, curr in enumerate(path):
             if not curr:
                 continue
-            card = self.deck.deck[index]
-            suit, rank = card.interpret()
+            suit, rank = cards[index]
 
             if index == locations[-1]:
                 locations.pop()
@@ -278,14 +320,14 @@ class PathFinder:
                 prev = curr
 
             if stacks[suit] == rank - 1:  # i.e., playable
-                newly_playable = card.value + 1
+                newly_playable = (suit, rank + 1)
                 stacks[suit] += 1
                 while newly_playable in hand:
                     hand.remove(newly_playable)
-                    newly_playable += 1
+                    newly_playable = (suit, newly_playable[1] + 1)
                     stacks[suit] += 1
             else:
-                hand.add(card.value)
+                hand.add((suit, rank))
         return locs_to_entries, locs_to_stacks
 
     def _solve_breakpoint(self, path, loc_to_cnct, loc_to_stack):
@@ -326,15 +368,12 @@ class PathFinder:
         # region ===== STEP ONE =====
         location = min(loc_to_cnct)
         stacks = loc_to_stack[location]  # access only, no modifying
-        hand1 = [card.interpret() for index, card \
-                 in enumerate(self.deck.deck[0:5]) if path[index]]
-        hand2 = [card.interpret() for index, card \
-                 in enumerate(self.deck.deck[5:10]) if path[index + 5]]
+        cards = self._cards
+        hand1 = list(itertools.compress(cards[0:5], path[0:5]))
+        hand2 = list(itertools.compress(cards[5:10], path[5:10]))
         hand1 = [tup for tup in hand1 if stacks[tup[0]] < tup[1]]
         hand2 = [tup for tup in hand2 if stacks[tup[0]] < tup[1]]
-        pace0 = [card.interpret() for index, card \
-                 in enumerate(self.deck.deck[location:]) \
-                    if path[index + location]]
+        pace0 = list(itertools.compress(cards[location:], path[location:]))
         # endregion
 
 
@@ -413,10 +452,9 @@ class PathFinder:
         for i in range(location + 1):  # recover the hand
             if not path[i]:
                 continue
-            card = self.deck.deck[i]
-            suit, rank = card.interpret()
+            suit, rank = cards[i]
             if rank > stacks[suit]:
-                hand.add(card.value)
+                hand.add(suit << 31 | rank)
         _temp_hand = set(hand)
 
 
@@ -598,13 +636,13 @@ class ShapeOptions:
         return self.sh_ranks
 
     def get_hand_dist_concerns(self, cards):
-        """Returns ranks of cards with hand dist concern."""
+        """Returns ranks of (location, Card) pairs with hand dist concern."""
         result = []
         if not self.check_for_hand_dist:
             return result
         counts = [None, 0, 0, 0, 0, 0]
-        for card in cards:
-            if card.location >= self.hand_capacity:
+        for location, card in cards:
+            if location >= self.hand_capacity:
                 return result
             counts[card.rank] += 1
             if counts[card.rank] == 2:
@@ -619,6 +657,8 @@ class ShapeIdentifier:
         counts (Counter): Amount of each type of card
         locations (list): list of Card locations
     """
+    __slots__ = ("options", "_locations", "_index", "_path", "_playable")
+
     def __init__(self, options: ShapeOptions = None):
         """Initializes based on suit ordering and location info.
 
@@ -644,13 +684,14 @@ class ShapeIdentifier:
         self._playable = [None, -1, None, None, None, None]
 
     def get_shape(self, cards):
-        """Gets shape of cards. Sets self._locations."""
+        """Gets shape of (location, Card) pairs. Sets self._locations."""
         self._set_protected_attrs()
         ordering = []
         is_first = [None, True, True, True, True, True]
         is_played = [True, False, False, False, False, False]
-        for card in cards:
-            if is_first[card.rank] and self.options.is_bdr(card):
+        bdrs = self.options.bdrs
+        for location, card in cards:
+            if is_first[card.rank] and card.rank in bdrs:
                 is_first[card.rank] = False
                 continue
             if is_played[card.rank]:
@@ -659,7 +700,7 @@ class ShapeIdentifier:
                 is_played[card.rank] = True
             ordering.append(card.rank)
             is_first[card.rank] = False
-            self._locations[card.rank].append(card.location)
+            self._locations[card.rank].append(location)
         ordering = tuple(ordering)
         # print(self._locations)
         # print(shape)
@@ -699,24 +740,26 @@ class ShapeIdentifier:
         Returns:
             list: possible paths for this suit ordering through the deck
         """
-        self._index += 1
-        rank = self._index
+        rank = self._index + 1
+        self._index = rank
+        path = self._path
         if rank == len(self._locations):
-            answer = tuple(self._path)
-            self._index -= 1
-            self._path = self._path[:-1]
+            answer = tuple(path)
+            self._index = rank - 1
+            del path[-1]
             return [answer]
         locations = self._locations[rank]
-        playable = self._playable[rank]
+        all_playable = self._playable
+        playable = all_playable[rank]
 
         if rank in self.options.sh_ranks:
+            cleared = [False] * (len(all_playable) - (rank + 1))
             paths = []
             for loc in locations:
                 paths += self._helper(loc, max(loc, playable))
                 self._index = rank
-                self._path = self._path[:rank - 1]
-                self._playable = self._playable[:rank + 1] + \
-                    [False] * (len(self._playable) - (rank + 1))
+                del path[rank - 1:]
+                all_playable[rank + 1:] = cleared
             return paths
 
         attempt = locations[0]
@@ -727,12 +770,11 @@ class ShapeIdentifier:
         if attempt < playable:
             return self._helper(attempt, playable)
 
-        attempt = bisect(locations, self._playable[rank]) - 1
-        path1 = self._helper(locations[attempt], self._playable[rank])
+        attempt = bisect(locations, playable) - 1
+        path1 = self._helper(locations[attempt], playable)
         self._index = rank
-        self._path = self._path[:rank - 1]
-        self._playable = self._playable[:rank + 1] + \
-            [False] * (len(self._playable) - (rank + 1))
+        del path[rank - 1:]
+        all_playable[rank + 1:] = [False] * (len(all_playable) - (rank + 1))
         path2 = self._helper(locations[attempt + 1], locations[attempt + 1])
 
         return path1 + path2
@@ -744,8 +786,10 @@ class ShapeIdentifier:
         is through checking possible paths on this deck.
         """
         self._path.append(location)
-        if self._index + 1 < len(self._playable):
-            self._playable[self._index + 1] = playable
+        index = self._index + 1
+        all_playable = self._playable
+        if index < len(all_playable):
+            all_playable[index] = playable
         return self.identify_recurse()
 
 if __name__ == "__main__":
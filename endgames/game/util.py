@@ -1,8 +1,24 @@
 """Methods for fetching initial positions and other utility."""
 
+import logging
 import random
+import re
+import threading
+from functools import lru_cache
 from endgames.game.variants import Variant, VARIANT_NAMES_DICT
 
+RANK_PATTERN = re.compile("[1-5]")
+BASE_62 = b"abcdefghijklmnopqrstuvwxyz0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+class _ThreadRandom(threading.local):
+    """Holds one Random per thread, reseeded on every shuffle."""
+    def __init__(self):
+        super().__init__()
+        self.rng = random.Random()
+
+_RNG = _ThreadRandom()
+
+@lru_cache(maxsize=64)
 def lookup_variant(variant_name):
     """Gives Variant object that has name variant_name.
 
@@ -14,6 +30,7 @@ def lookup_variant(variant_name):
     """
     return VARIANT_NAMES_DICT[variant_name]
 
+@lru_cache(maxsize=64)
 def lookup_hand_size(num_players):
     """Return the Hanab Live hand size given num_players.
 
@@ -29,6 +46,44 @@ def lookup_hand_size(num_players):
         return 3
     return 4
 
+@lru_cache(maxsize=64)
+def get_card_plan(variant: Variant):
+    """Lists the cards of a variant's unshuffled deck.
+
+    Depends only on the variant, so it is computed once per variant
+    and shared by every Deck built from it.
+
+    Args:
+        variant (Variant): a Hanab Live game variant
+
+    Returns:
+        tuple: (suit index, rank) pairs in deck order
+    """
+    plan = []
+    for suit_index, suit in enumerate(variant.suits):
+        for rank in variant.clue_ranks:
+            if variant.stack_size == 4 and rank == 5:
+                continue
+            plan.append((suit_index, rank))
+            if suit.one_of_each:
+                continue
+            if variant.sudoku:
+                plan.append((suit_index, rank))
+            elif rank == 1:
+                if variant.up_or_down or suit.reversed:
+                    continue
+                plan.append((suit_index, rank))
+                plan.append((suit_index, rank))
+            elif rank == variant.critical_rank:
+                continue
+            elif rank == 5:
+                if suit.reversed:
+                    plan.append((suit_index, rank))
+                    plan.append((suit_index, rank))
+            else:
+                plan.append((suit_index, rank))
+    return tuple(plan)
+
 class Deck:
     """A deck of cards for a Hanabi-like game
 
@@ -62,6 +117,7 @@ class Deck:
         self.seed = None
         self.variant = variant
         self.deck = None  # overwritten by _init_deck()
+        self._unshuffled = None  # overwritten by _init_deck()
         self._init_deck(variant)
 
     def _init_deck(self, variant: Variant):
@@ -70,47 +126,14 @@ class Deck:
         Args:
             variant (Variant): a Hanab Live game variant
         """
-        deck = []
-        for suit_index, suit in enumerate(variant.suits):
-            for rank in variant.clue_ranks:
-                # intentionally do not set card location
-                # only set card location when creating deck ordering
-
-                if variant.stack_size == 4 and rank == 5:
-                    continue
-                deck.append(Card(suit_index, rank))
-                if suit.one_of_each:
-                    continue
-                if variant.sudoku:
-                    deck.append(Card(suit_index, rank))
-                elif rank == 1:
-                    if variant.up_or_down or suit.reversed:
-                        continue
-                    deck.append(Card(suit_index, rank))
-                    deck.append(Card(suit_index, rank))
-                elif rank == variant.critical_rank:
-                    continue
-                elif rank == 5:
-                    if suit.reversed:
-                        deck.append(Card(suit_index, rank))
-                        deck.append(Card(suit_index, rank))
-                else:
-                    deck.append(Card(suit_index, rank))
-
-        self.deck = deck
+        self.deck = [get_card(suit_index, rank)
+                     for suit_index, rank in get_card_plan(variant)]
+        self._unshuffled = tuple(self.deck)  # kept for reset()
 
     def __repr__(self):
         """Formats as a string."""
-        fmt = ""
-        for card in self.deck:
-            suit_index, rank = card.interpret()
-            suit = self.variant.suits[suit_index]
-            if suit.abbreviation is not None:
-                fmt += suit.abbreviation.lower()
-            else:
-                fmt += suit.id.lower()
-            fmt += str(rank) + " "
-        return fmt[:-1]
+        tokens = self.variant.card_tokens
+        return " ".join([tokens[card.suit][card.rank] for card in self.deck])
 
     def set_deck(self, deck):
         """Setter method for self.deck in case of unseeded deck.
@@ -118,31 +141,18 @@ class Deck:
         Args:
             deck (list): a list of strings representing cards
         """
+        token_indices = self.variant.suit_token_indices
         self.deck = []
         for word in deck:
             rank = 0
-            for index, char in enumerate(word):
-                if char in "12345":
-                    rank = int(char)
-                    word = word[:index] + word[index + 1:]
-                    word.strip()
-                    break
-            suit = "Chromatic"
-            for attempt in self.variant.suits:
-                if attempt.abbreviation is not None and \
-                    word.lower() == attempt.abbreviation.lower():
-                    suit = attempt.name
-                    break
-                if attempt.id is not None and \
-                    word.lower() == attempt.id.lower():
-                    suit = attempt.name
-                    break
-                if word.lower() == attempt.name.lower():
-                    suit = attempt.name
-                    break
-            suit_index = self.variant.suit_names.index(suit)
-            self.deck.append(Card(suit_index, rank))
-        self._set_card_locations()
+            match = RANK_PATTERN.search(word)
+            if match is not None:
+                rank = int(match.group())
+                word = (word[:match.start()] + word[match.end():]).strip()
+            suit_index = token_indices.get(word.lower())
+            if suit_index is None:
+                suit_index = token_indices["chromatic"]
+            self.deck.append(get_card(suit_index, rank))
 
     def print(self, cutoff=None):
         """Prints the deck.
@@ -167,21 +177,24 @@ class Deck:
         Returns:
             list: a copy of deck sorted by seed
         """
-        local_random = random.Random()
         self.seed = seed
-        local_random.seed(seed)
-        local_random.shuffle(self.deck)
-        self._set_card_locations()
+        rng = _RNG.rng
+        rng.seed(seed)
+        rng.shuffle(self.deck)
 
-    def _set_card_locations(self):
-        """Assigns locations to each card in the deck.
+    def reset(self, seed):
+        """Reshuffles the variant's cards according to a new seed.
 
-        Helper function that should be called any time the deck is
-        reordered and the attribute Card.location will be used at
-        any point.
+        Gives the same order as Deck(self.variant).shuffle(seed) but
+        reuses this deck's list of cards, so it suits loops over many
+        seeds. Anything still holding the old order (e.g. a PathFinder)
+        must not be used afterwards.
+
+        Args:
+            seed (str): a seed string as used on Hanab Live
         """
-        for location, card in enumerate(self.deck):
-            card.set_location(location)
+        self.deck = list(self._unshuffled)
+        self.shuffle(seed)
 
     def check_for_infeasibility(self, si=None):
         """Checks if the deck is impossible to win.
@@ -219,21 +232,26 @@ class Deck:
         pf = PathFinder(self, si, 2, 5)
         try:
             return pf.check_for_infeasibility()
-        except BaseException as e:
-            print("An error occurred on the following deck.")
-            print(self)
-            print(create_hypo_url(self))
-            raise e
+        except Exception:
+            # the deck and its URL are only formatted if the record is
+            # emitted
+            logging.error("An error occurred on the following deck.\n%s\n%s",
+                          self, _LazyHypoURL(self))
+            raise
 
 class Card:
     """A card with suit and rank
 
+    Cards are shared between decks (see get_card()), so a card's
+    location in a deck is its index in Deck.deck.
+
     Attributes:
         value (int): Encodes suit and rank
         suit (int): The suit index
         rank (int): The numerical rank of the card
-        location (int): The card's location in a deck
     """
+    __slots__ = ("value", "suit", "rank", "index")
+
     def __init__(self, suit_index, rank):
         """
         Initializes the card with suit and rank.
@@ -249,13 +267,14 @@ class Card:
         self.rank = rank
         # assert self.suit != 5  # fixed an indexing error
         self.index = 5 * self.suit + self.rank
-        self.location = None
     def interpret(self):
         """Returns (suit index, rank)"""
         return self.suit, self.rank
-    def set_location(self, new_value):
-        """Setter function for Card.location"""
-        self.location = new_value
+
+@lru_cache(maxsize=None)
+def get_card(suit_index, rank):
+    """Returns the shared Card with the given suit index and rank."""
+    return Card(suit_index, rank)
 
 def create_bespoke_deck(deck, variant=None):
     """Create deck from input. Assumes No Variant."""
@@ -278,24 +297,35 @@ def create_hypo_url(deck, num_players=2):
         str: hanab live url
     """
     prefix = "https://hanab.live/shared-replay-json/"
-    base_62 = "abcdefghijklmnopqrstuvwxyz0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    result = ""
+    result = bytearray()
 
     # First section: number of players, rank min, rank max, and deck
-    result += str(num_players)
-    result += "15"  # represents rank min & rank max
-    result += "".join(base_62[card.index - 1] for card in deck.deck)
-    result += ","
+    result += str(num_players).encode()
+    result += b"15"  # represents rank min & rank max
+    result.extend([BASE_62[card.index - 1] for card in deck.deck])
+    result += b","
 
     # Second section: game actions
     # We only use a trivial action here; Alice plays/bombs slot 1
-    result += "00ae"  # the two numbers describe available actions
-    result += ","
+    result += b"00ae"  # the two numbers describe available actions
+    result += b","
 
     # Third section: variant number
-    result += str(deck.variant.id)
+    result += str(deck.variant.id).encode()
+
+    # Now add '-'s to the URL for readability (line breaks), working
+    # back to front so the offsets still to come stay valid
+    for i in range((len(result) - 1) // 20 * 20, 0, -20):
+        result[i:i] = b"-"
 
-    # Now add '-'s to the URL for readability (line breaks)
-    result = "-".join(result[i:i+20] for i in range(0, len(result), 20))
+    return prefix + result.decode()
+
+class _LazyHypoURL:
+    """Formats as create_hypo_url(deck), so logging can defer it."""
+    __slots__ = ("deck",)
+
+    def __init__(self, deck):
+        self.deck = deck
 
-    return prefix + result
+    def __str__(self):
+        return create_hypo_url(self.deck)
@@ -4,6 +4,7 @@ This contains the basic logic for dealing with variants.
 # pylint: disable=invalid-name
 
 import json
+from functools import cached_property, lru_cache
 import inflection
 from endgames.game.io import fetch_json
 from endgames.game.suits import find_suit
@@ -26,7 +27,7 @@ class Variant:
     def __init__(self, id, name, suits, **kwargs):
         self.name = name
         self.id = id
-        self.suit_names = suits
+        self.suit_names = tuple(suits)
         self.suits = []
         for suit in suits:
             if "Reversed" in suit:
@@ -56,20 +57,45 @@ class Variant:
             key = inflection.underscore(key)
             setattr(self, key, value)
 
+        stack_size = self.stack_size
+        if stack_size is None:
+            stack_size = len(self.suits) if self.sudoku else 5
+        self._max_score = stack_size * len(self.suits)
+
+    # lookups for reading and writing decks as strings, built on first
+    # use since only a few of the loaded variants are ever played
+
+    @cached_property
+    def suit_abbreviations(self):
+        """Returns the lowercase abbreviation of each suit, in order."""
+        abbreviations = []
+        for suit in self.suits:
+            if suit.abbreviation is not None:
+                abbreviations.append(suit.abbreviation.lower())
+            else:
+                abbreviations.append(suit.id.lower())
+        return abbreviations
+
+    @cached_property
+    def card_tokens(self):
+        """Returns the token of each card, indexed by suit then rank."""
+        return [[abbreviation + str(rank) for rank in range(6)]
+                for abbreviation in self.suit_abbreviations]
+
+    @cached_property
+    def suit_token_indices(self):
+        """Returns a dict from lowercase suit token to suit index."""
+        lookup = {}
+        for suit_index, suit in enumerate(self.suits):
+            # earlier suits and attributes take priority
+            for attempt in (suit.abbreviation, suit.id, suit.name):
+                if attempt is not None:
+                    lookup.setdefault(attempt.lower(), suit_index)
+        return lookup
+
     def get_max_score(self):
         """Returns the maximum possible score in this variant."""
-        num_suits = len(self.suits)
-        try:
-            stack_size = self.stack_size
-        except AttributeError:
-            stack_size = None
-        try:
-            if stack_size is None and self.sudoku:
-                stack_size = num_suits
-        except AttributeError:
-            stack_size = 5  # default value
-
-        return stack_size * num_suits
+        return self._max_score
 
 
 def update_variants():
@@ -77,33 +103,27 @@ def update_variants():
     response = fetch_json(VARIANT_URL)
     with open(VARIANT_PATH, 'w', encoding="utf8") as json_file:
         json.dump(response, json_file)
+    load_variants.cache_clear()
     print("Updated variants.")
 
-def get_variant_dict():
-    """Returns list of Variant objects."""
+@lru_cache(maxsize=1)
+def load_variants():
+    """Returns tuple of Variant objects, parsed once and shared."""
     try:
         with open(VARIANT_PATH, encoding="utf8") as json_file:
             json_list = json.load(json_file)
-        variant_dict = {}
-        for variant_data in json_list:
-            variant_dict[variant_data["id"]] = Variant(**variant_data)
-        return variant_dict
     except FileNotFoundError:
         update_variants()
-        return get_variant_dict()
+        return load_variants()
+    return tuple(Variant(**variant_data) for variant_data in json_list)
+
+def get_variant_dict():
+    """Returns dict of Variant objects keyed by id."""
+    return {variant.id: variant for variant in load_variants()}
 
 def get_variant_names_dict():
-    """Returns list of Variant objects."""
-    try:
-        with open(VARIANT_PATH, encoding="utf8") as json_file:
-            json_list = json.load(json_file)
-        variant_dict = {}
-        for variant_data in json_list:
-            variant_dict[variant_data["name"]] = Variant(**variant_data)
-        return variant_dict
-    except FileNotFoundError:
-        update_variants()
-        return get_variant_names_dict()
+    """Returns dict of Variant objects keyed by name."""
+    return {variant.name: variant for variant in load_variants()}
 
 def find_variant(variant_id):
     """Returns Variant object with given variant_id."""
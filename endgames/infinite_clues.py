@@ -1,5 +1,6 @@
 """Hanabi with infinite clues."""
 
+from collections import defaultdict
 from fractions import Fraction
 from typing import Callable
 import itertools
@@ -32,11 +33,16 @@ class Hanabi:
         """Returns the maximum possible score--i.e., win condition."""
         return sum(self.stacks)
 
-    def which_stack(self, card):
-        """Returns the stack index if card can be played, else None."""
+    def which_stack(self, card, stacks=None):
+        """Returns the stack index if card can be played, else None.
+
+        Checks against self.stacks unless stacks is given.
+        """
+        if stacks is None:
+            stacks = self.stacks
         if self.is_successor:
-            return self.is_successor(self.stacks, card)
-        return card[0] if self.stacks[card[0]] + 1 == card[1] else None
+            return self.is_successor(stacks, card)
+        return card[0] if stacks[card[0]] + 1 == card[1] else None
 
 class Card(tuple):
     """Generic card class."""
@@ -80,27 +86,29 @@ class InfiniteClueHanabi(Hanabi):
         hand1 = gs[4]
         trash2 = gs[5]
         hand2 = gs[6]
-        actions = {}
-
-        self.stacks = stacks
+        actions = defaultdict(int)
 
         # TODO: deal with empty deck
         deck_size = len(deck) + trash
         if deck_size <= 0:
             return 
-        increment = 1 / (len(deck) + trash)
+        # weights are counts of equally likely draws out of deck_size,
+        # kept as ints until the end so probabilities stay exact
         deck_lookup = {}
         if trash:
-            deck_lookup[(0, 1)] = trash * increment
+            deck_lookup[(0, 1)] = [trash, deck]
+        # splice the deck once per distinct card, not once per copy
+        counts, last_index = {}, {}
         for i, card in enumerate(deck):
-            new_deck = deck[:i] + deck[i+1:]  # expensive??
-            deck_lookup[card] = [deck_lookup.get(card, 0) + increment, new_deck]
+            counts[card] = counts.get(card, 0) + 1
+            last_index[card] = i
+        for card, i in last_index.items():
+            deck_lookup[card] = [counts[card], deck[:i] + deck[i+1:]]
 
         # actions in player 1's hand
-        increment = 1 / (len(hand1) + trash1)
         if trash1:
             for draw, result in deck_lookup.items():
-                [prob, new_deck] = result
+                [weight, new_deck] = result
                 if draw == (0, 1):
                     new_gs = (stacks,
                               trash - 1,
@@ -117,20 +125,17 @@ class InfiniteClueHanabi(Hanabi):
                               (*hand1, draw),
                               trash2,
                               hand2)
-                actions[new_gs] = actions.get(new_gs, 0) + prob
+                actions[new_gs] += weight
         for i, card in enumerate(hand1):
-            print(card)
-            stack_index = self.which_stack(card)
+            stack_index = self.which_stack(card, stacks)
             if stack_index is None:
                 new_stacks = stacks
             else:
-                print(stacks)
                 new_stacks = stacks[:stack_index] + (stacks[stack_index] + 1,) + stacks[stack_index+1:]
-                print(new_stacks, "yay")
             new_hand = hand1[:i] + hand1[i+1:]
 
             for draw, result in deck_lookup.items():
-                [prob, new_deck] = result
+                [weight, new_deck] = result
                 if draw == (0, 1):
                     new_gs = (new_stacks,
                               trash - 1,
@@ -147,13 +152,14 @@ class InfiniteClueHanabi(Hanabi):
                               (*new_hand, draw),
                               trash2,
                               hand2)
-                actions[new_gs] = actions.get(new_gs, 0) + prob
-
+                actions[new_gs] += weight
+        actions = {new_gs: Fraction(weight, deck_size)
+                   for new_gs, weight in actions.items()}
 
         # actions in player 2's hand
         if swap:
             swapped_gs = (stacks, trash, deck, trash2, hand2, trash1, hand1)
-            other_actions = self.get_successors(swapped_gs, False)
+            other_actions = self.get_successors(swapped_gs, None, False)
             for key, value in other_actions.items():
                 actions[key] = actions.get(key, 0) + value
 
@@ -214,40 +220,45 @@ def dp():
           ())  # second player's active cards
     stack = [gs]
     lookup = {}
+    # each expanded state is finalized exactly once, when its last
+    # unsolved successor is solved, rather than being revisited
+    parents = defaultdict(list)  # state to (parent, prob) pairs
+    pending = {}  # expanded state to count of unsolved successors
+    partial = {}  # expanded state to sum over solved successors
 
     # TODO: make this work. look at maxing return rather than avging
     while stack:
         curr = stack.pop()
+        if curr in lookup or curr in pending:
+            continue
         probs = hb.get_successors(curr, None)
 
-        # try to solve the gamestate now, while checking if possible
-        solved, ans, state = True, Fraction(), None
-        gen = iter(probs.items())
-        for state, prob in gen:
+        # sum over the successors that are already solved
+        pending[curr], partial[curr] = 0, Fraction()
+        for state, prob in probs.items():
             if prob == 0:  # may be unnecessary
                 continue
-            if state not in lookup:
-                if hb.check_win_condition(state):
-                    lookup[state] = 1
-                else:
-                    solved = False
-                    break
-            ans += prob * lookup[state]
-
-        # solve it
-        if solved:
-            lookup[curr] = ans
-            continue
-
-        # couldn't solve it--solve it later and solve subproblems now
-        stack.append(curr)
-        stack.append(state)
-        for state, prob in gen:
-            if prob == 0:
-                continue
-            if state not in lookup:
+            if state not in lookup and hb.check_win_condition(state):
+                lookup[state] = 1
+            if state in lookup:
+                partial[curr] += prob * lookup[state]
+            else:
+                pending[curr] += 1
+                parents[state].append((curr, prob))
                 stack.append(state)
 
+        # solve it, then any parents waiting only on it
+        solved = [curr] if pending[curr] == 0 else []
+        while solved:
+            state = solved.pop()
+            del pending[state]
+            lookup[state] = partial.pop(state)
+            for parent, prob in parents.pop(state, ()):
+                partial[parent] += prob * lookup[state]
+                pending[parent] -= 1
+                if pending[parent] == 0:
+                    solved.append(parent)
+
     return lookup[gs]
 
 if __name__ == "__main__":
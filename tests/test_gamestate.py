@@ -0,0 +1,110 @@
+"""Tests for replaying games with GameState."""
+
+import pytest
+from endgames.game.gamestate import GameState
+from endgames.game.util import Deck
+
+SEEDS = ["p1", "p2", "p3"]
+
+
+def _make_game(seed, player_count=2, variant="No Variant"):
+    """Builds game data whose actions cycle through every action type
+
+    Ends with a vtk action once the draw pile runs out.
+    """
+    deck = Deck(variant)
+    deck.shuffle(seed)
+    data = {
+        "deck": [{"suitIndex": card.suit, "rank": card.rank}
+                 for card in deck.deck],
+        "players": [f"player{i}" for i in range(player_count)],
+        "actions": [],
+        "options": {"variant": variant},
+    }
+    state = GameState(data, 0)
+    while state.draw_pile_size > 0:
+        oldest = next(iter(state.hands[state.current_player_index]))
+        other = (state.current_player_index + 1) % player_count
+        kind = len(data["actions"]) % 4
+        if kind == 0:
+            action = {"type": 0, "target": oldest, "value": 0}
+        elif kind == 1 or state.clue_token_count < 1:
+            action = {"type": 1, "target": oldest, "value": 0}
+        else:
+            action = {"type": kind, "target": other, "value": 1}
+        data["actions"].append(action)
+        state.implement_action(action)
+    data["actions"].append({"type": 4, "target": 0, "value": 0})
+    return data
+
+
+def _summarize(state):
+    """Returns the turn-dependent info of a state"""
+    return (state.turn, state.action_count, state.score,
+            state.clue_token_count, state.strike_count,
+            state.current_player_index, state.draw_pile_size,
+            list(state.play_stack_tops), list(state.discard_pile),
+            [list(hand) for hand in state.hands], repr(state))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_review_turn(seed):
+    """Verifies chained and rewinding reviews match fresh replays"""
+    data = _make_game(seed)
+    count = len(data["actions"])
+    expected = [_summarize(GameState(data, n)) for n in range(count)]
+
+    state = GameState(data, 0)
+    for n in range(count):
+        state = state.review_turn(n)
+        assert _summarize(state) == expected[n]
+
+    last = GameState(data, count - 1)
+    for n in range(count):
+        assert _summarize(last.review_turn(n)) == expected[n]
+    assert _summarize(last) == expected[-1]
+
+    assert last.review_turn(count) is False
+    assert last.review_turn(-1) is False
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_snapshots(seed):
+    """Verifies snapshots()[n] matches a fresh replay to turn n"""
+    data = _make_game(seed, player_count=3)
+    snapshots = GameState(data, 7).snapshots()
+    assert len(snapshots) == len(data["actions"])
+    for n, state in enumerate(snapshots):
+        assert _summarize(state) == _summarize(GameState(data, n))
+
+
+def test_review_turn_after_unrecorded_action():
+    """Verifies reviews follow the record after an unrecorded action"""
+    data = _make_game("p1")
+    state = GameState(data, 4)
+    state.implement_action({"type": 3, "target": 1, "value": 5})
+    assert _summarize(state) != _summarize(GameState(data, 5))
+    assert _summarize(state.review_turn(10)) == \
+        _summarize(GameState(data, 10))
+
+
+def test_repr_any_rank():
+    """Verifies cards with ranks outside 1-5 are printed"""
+    data = _make_game("p1")
+    data["deck"][0].update(suitIndex=0, rank=7)
+    assert "'R7'" in repr(GameState(data, 0))
+
+
+@pytest.mark.parametrize("variant, clue_count", [
+    ("No Variant", 8),
+    ("Clue Starved (5 Suits)", 7.5),
+])
+def test_clue_starved(variant, clue_count):
+    """Verifies a discard gains half a clue in Clue Starved variants"""
+    data = _make_game("p1")
+    data["options"]["variant"] = variant
+    data["actions"][:2] = [
+        {"type": 2, "target": 1, "value": 0},
+        {"type": 1, "target": 5, "value": 0},
+    ]
+    assert GameState(data, 2).clue_token_count == clue_count
@@ -2,6 +2,7 @@
 
 import pytest
 from endgames.game import io, study
+from endgames.game.util import Deck
 
 TESTS = io.read_printout("assets/rama_old_decks.txt") + \
     io.read_printout("assets/rama_hard_decks.txt") + \
@@ -22,3 +23,17 @@ def test_study(raw_deck, answer):
     result = deck.check_for_infeasibility()[0]
     assert result is True or result is False
     assert str(result) == answer[0]
+
+@pytest.mark.parametrize("red_reversed, answer", [(True, True), (False, False)])
+def test_check_for_pace_loss(red_reversed, answer):
+    """Verifies the earliest-copy pace check on an unshuffled deck
+
+    Args:
+        red_reversed (bool): move red to the end, highest rank first
+        answer (bool): whether a pace loss is expected
+    """
+    deck = Deck()
+    if red_reversed:
+        deck.deck.sort(key=lambda card: (card.suit == 0, -card.rank))
+    pf = study.PathFinder(deck, study.ShapeIdentifier(), 2, 5)
+    assert pf.check_for_pace_loss() is answer
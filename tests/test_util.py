@@ -0,0 +1,18 @@
+"""Tests for decks."""
+
+import pytest
+from endgames.game.util import Deck, create_bespoke_deck
+
+@pytest.mark.parametrize("variant_name", [
+    "No Variant",
+    "Reversed (5 Suits)",
+    "Black Reversed (6 Suits)",
+    "Rainbow (5 Suits)",
+])
+def test_set_deck_round_trip(variant_name):
+    """Verifies a deck is read back from its string form"""
+    deck = Deck(variant_name)
+    deck.shuffle("round trip")
+    copied = create_bespoke_deck(repr(deck).split(), variant_name)
+    assert [card.interpret() for card in copied.deck] == \
+        [card.interpret() for card in deck.deck]
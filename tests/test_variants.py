@@ -0,0 +1,20 @@
+"""Tests for variant lookups."""
+
+import pytest
+from endgames.game.variants import VARIANT_NAMES_DICT
+
+@pytest.mark.parametrize("variant_name, max_score", [
+    ("No Variant", 25),
+    ("6 Suits", 30),
+    ("Reversed (5 Suits)", 25),
+    ("Sudoku (5 Suits)", 25),
+    ("Sudoku (4 Suits)", 16),
+])
+def test_max_score(variant_name, max_score):
+    """Verifies max scores for default, sudoku, and fixed stack sizes"""
+    assert VARIANT_NAMES_DICT[variant_name].get_max_score() == max_score
+
+def test_max_score_all_variants():
+    """Verifies every loaded variant has a max score"""
+    for variant in VARIANT_NAMES_DICT.values():
+        assert variant.get_max_score() > 0